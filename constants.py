@@ -19,6 +19,52 @@ MIN_ANGLE_DIFF = 30             # Minimális szögkülönbség kereszteződések
 MAX_PARALLEL_DISTANCE = 50      # Maximális távolság párhuzamos vonalak között (pixel)
 MIN_LENGTH_RATIO = 0.5          # Minimális hosszarány a vonalak összehasonlításánál
 
+# Aktív régiók (ROI) paraméterei
+ROI_ENABLED = False             # Háttér kihagyása az előfeldolgozás és a detektálás során
+ROI_DOWNSCALE = 4               # Kicsinyítés mértéke az aktivitási térkép számításához
+ROI_TILE_SIZE = 32              # Csempe mérete pixelben (teljes felbontáson)
+ROI_VARIANCE_THRESHOLD = 30     # Minimális szürkeségi szórásnégyzet egy aktív csempében
+ROI_HALO = 16                   # Ráhagyás a régiók szélén a szűrők környezete miatt (pixel)
+ROI_STRIP_TILES = 4             # Ennyi csemposort vonunk össze egy téglalapcsíkba
+ROI_MAX_WORK_FRACTION = 0.6     # E feletti (ráhagyással számolt) munkaarány esetén a teljes képet dolgozzuk fel
+ROI_MASK_SUFFIX = "_mask"       # Felhasználói maszk toldaléka (pl. palcika1_mask.png)
+
+# Képen belüli párhuzamos feldolgozás paraméterei
+PARALLEL_BANDS = 1              # Vízszintes sávok száma (1: soros feldolgozás, 0: processzormagok száma)
+CHECK_BANDS = (2, 4, 8, 16)     # Az ellenőrzés (main.py --check) során vizsgált sávszámok
+CHECK_TIMING_RUNS = 5           # Az előfeldolgozás időmérésének ismétlésszáma (a legjobb futás számít)
+
+# Időkeret (anytime mód) paraméterei
+TIME_BUDGET = None                      # Képenkénti időkeret másodpercben (None: nincs korlát)
+DEADLINE_PIXELS_PER_SECOND = 30e6       # Az előfeldolgozás és a Hough transzformáció becsült sebessége (pixel/s)
+DEADLINE_DETECT_SECONDS = 1e-3          # A vonaldetektálás képmérettől független becsült ideje (s)
+DEADLINE_BAND_SECONDS = 0.5e-3          # Minden további sáv becsült többletideje (s)
+DEADLINE_ROI_PIXELS_PER_SECOND = 150e6  # Az aktivitási maszk és a téglalapok számításának becsült sebessége (pixel/s)
+DEADLINE_SAVE_PIXELS_PER_SECOND = 100e6 # A képek mentésének becsült sebessége (pixel/s)
+DEADLINE_COPY_PIXELS_PER_SECOND = 500e6 # Az eredmény kép teljes méretű másolatának becsült sebessége (pixel/s)
+DEADLINE_PAIR_SECONDS = 4e-6            # Egy vonalpár vizsgálatának becsült ideje az összevonásnál (s)
+DEADLINE_LINE_PAIR_SECONDS = 25e-6      # Egy vonalpár kereszteződés- és párhuzamosságvizsgálatának becsült ideje (s)
+DEADLINE_DETECT_SHARE = 0.4             # Az előfeldolgozás és a vonaldetektálás eddig a hányadig futhat
+DEADLINE_PROBE_FRACTION = 0.25          # A próba detektálás a detektálási idő ekkora részét kapja (becslés szerint)
+DEADLINE_MIN_PIXELS = 120000            # A próba legalább ennyi pixelen dolgozik (ha ez sem fér bele, a detektálás elmarad)
+DEADLINE_REFINE_FACTOR = 2              # A próba után csak legalább ennyiszer több pixelen detektálunk újra
+DEADLINE_HOUGH_SHARE = 0.4              # Ha az előfeldolgozás után ennél több telt el, emelt Hough küszöb
+DEADLINE_HOUGH_FACTOR = 2               # A Hough küszöb szorzója minőségcsökkentéskor
+DEADLINE_HOUGH_SKIP_SHARE = 0.6         # Ha az előfeldolgozás után ennél több telt el, a Hough elmarad
+DEADLINE_SAVE_SHARE = 0.5               # A köztes képek mentése eddig a hányadig férhet bele
+DEADLINE_MAX_SEGMENTS = 200             # Időkeret esetén feldolgozott leghosszabb szakaszok maximális száma
+DEADLINE_MIN_SEGMENTS = 20              # Ennyi leghosszabb szakaszt akkor is feldolgozunk, ha a becslés szerint nincs rá idő
+DEADLINE_MERGE_SHARE = 0.65             # Az összevonás eddig a hányadig futhat
+DEADLINE_PAIRS_SHARE = 0.75             # A vonalpárok vizsgálata eddig a hányadig futhat
+DEADLINE_GROUPING_SHARE = 0.8           # A kereszteződések csoportosítása eddig a hányadig futhat
+CHECK_BUDGETS = (0.05, 0.02)            # Az ellenőrzés során vizsgált időkeretek (s)
+CHECK_COUNT_TOLERANCE = 0.4             # Időkerettel a darabszám legfeljebb ekkora hányaddal térhet el (de legalább 1-gyel)
+CHECK_ROI_MAX_COUNT_DIFF = 1            # A háttér kihagyásával legfeljebb ennyivel térhet el a darabszám
+
+# Köztes bináris képek (kötegelt futás) tárolási paraméterei
+MASK_EXTENSION = ".bits"        # Bitekre pakolt maszkok kiterjesztése
+MASK_COMPRESS = False           # zlib tömörítés (tömörítve nem képezhető memóriába)
+
 # Könyvtár konstansok
 INPUT_DIR = "./images"
 OUTPUT_DIR = "./output"
\ No newline at end of file
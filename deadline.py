@@ -0,0 +1,281 @@
+"""
+Deadline osztály
+--------------
+A képenkénti időkeret figyeléséért felelős osztály.
+Méri az eltelt időt, eldönti, hogy az egyes lépések előtt szükség van-e
+minőségcsökkentésre, és nyilvántartja az alkalmazott minőségcsökkentéseket.
+"""
+
+import os
+import time
+import numpy as np
+from math import sqrt
+from line_detector import LineDetector
+from constants import (DEADLINE_PIXELS_PER_SECOND, DEADLINE_DETECT_SECONDS, DEADLINE_BAND_SECONDS,
+                       DEADLINE_ROI_PIXELS_PER_SECOND, DEADLINE_DETECT_SHARE, DEADLINE_MIN_PIXELS,
+                       DEADLINE_PROBE_FRACTION, DEADLINE_REFINE_FACTOR,
+                       DEADLINE_HOUGH_SHARE, DEADLINE_HOUGH_FACTOR, DEADLINE_MAX_SEGMENTS,
+                       DEADLINE_MIN_SEGMENTS, DEADLINE_PAIR_SECONDS, DEADLINE_MERGE_SHARE,
+                       DEADLINE_LINE_PAIR_SECONDS, DEADLINE_PAIRS_SHARE)
+
+
+class Deadline:
+
+    """ Időkeret létrehozása, az időmérés indítása """
+    def __init__(self, budget=None):
+        """
+        Args:
+            budget: Időkeret másodpercben, None esetén nincs korlát
+        """
+        self.budget = budget
+        self.start = time.perf_counter()
+
+        # Az alkalmazott minőségcsökkentések nevei, alkalmazásuk sorrendjében
+        self.degradations = []
+
+        # A legutóbbi vonaldetektálás indulása és (lassulás nélkül) becsült ideje, valamint a mért
+        # és a becsült idő aránya, amellyel a becsléseket a gép pillanatnyi sebességéhez igazítjuk
+        self.detect_start = 0.0
+        self.detect_estimate = 0.0
+        self.slowdown = 1.0
+
+
+    """ Az indulás óta eltelt idő """
+    def elapsed(self):
+        """
+        Returns:
+            float: Eltelt idő másodpercben
+        """
+        return time.perf_counter() - self.start
+
+
+    """ Az időkeret adott hányadáig hátralévő idő """
+    def remaining(self, share=1.0):
+        """
+        Args:
+            share: Az időkeret vizsgált hányada (0-1 között)
+
+        Returns:
+            float: Hátralévő idő másodpercben (legalább 0), időkeret nélkül végtelen
+        """
+        if self.budget is None:
+            return float("inf")
+        return max(self.budget * share - self.elapsed(), 0.0)
+
+
+    """ Ellenőrzi, hogy elfogyott-e az időkeret adott hányada """
+    def exceeded(self, share=1.0):
+        """
+        Args:
+            share: Az időkeret vizsgált hányada (0-1 között)
+
+        Returns:
+            bool: True ha van időkeret és az eltelt idő meghaladja a hányadát
+        """
+        return self.budget is not None and self.elapsed() > self.budget * share
+
+
+    """ Ellenőrzi, hogy egy becsült idejű lépés belefér-e az időkeret adott hányadába """
+    def fits(self, seconds, share=1.0):
+        """
+        Args:
+            seconds: A lépés becsült ideje másodpercben
+            share: Az időkeret vizsgált hányada (0-1 között)
+
+        Returns:
+            bool: True ha nincs időkeret, vagy a lépés a hányadon belül befejeződik
+        """
+        return self.budget is None or self.elapsed() + seconds * self.slowdown <= self.budget * share
+
+
+    """ Minőségcsökkentés feljegyzése """
+    def degrade(self, name):
+        """
+        Args:
+            name: A minőségcsökkentés neve
+        """
+        if name not in self.degradations:
+            self.degradations.append(name)
+
+
+    """ Történt-e minőségcsökkentés """
+    def degraded(self):
+        """
+        Returns:
+            bool: True ha legalább egy minőségcsökkentés történt
+        """
+        return bool(self.degradations)
+
+
+    """ A vonaldetektálás becsült ideje a gép mért lassulása nélkül """
+    def detect_seconds(self, pixels, bands=1, roi=False):
+        """
+        Args:
+            pixels: A feldolgozott kép pixeleinek száma
+            bands: Vízszintes sávok száma (0: a processzormagok száma)
+            roi: Az aktivitási maszk is a detektálás része (a költségét is becsüljük)
+
+        Returns:
+            float: Becsült idő másodpercben
+        """
+        # A képmérettől független rész (függvényhívások, sávonkénti szálak) nem csökkenthető
+        if bands <= 0:
+            bands = os.cpu_count() or 1
+        seconds = DEADLINE_DETECT_SECONDS + DEADLINE_BAND_SECONDS * (bands - 1)
+        seconds += pixels / DEADLINE_PIXELS_PER_SECOND
+        if roi:
+            seconds += pixels / DEADLINE_ROI_PIXELS_PER_SECOND
+        return seconds
+
+
+    """ Egy vonaldetektálás indításának feljegyzése (a calibrate ehhez méri az időt) """
+    def start_detection(self, pixels, bands=1, roi=False):
+        """
+        Args:
+            pixels: A feldolgozott kép pixeleinek száma
+            bands: Vízszintes sávok száma (0: a processzormagok száma)
+            roi: Az aktivitási maszk is a detektálás része
+
+        Returns:
+            bool: True ha a detektálás (a mért lassulással) belefér az időkeret detektálási hányadába
+        """
+        self.detect_start = self.elapsed()
+        self.detect_estimate = self.detect_seconds(pixels, bands, roi)
+        return self.fits(self.detect_estimate, DEADLINE_DETECT_SHARE)
+
+
+    """ Kezdeti kicsinyítési arány: teljes felbontás, vagy egy kis felbontású próba """
+    def detect_scale(self, shape, bands=1, roi=False):
+        """
+        Args:
+            shape: A kép mérete (magasság, szélesség)
+            bands: Vízszintes sávok száma (0: a processzormagok száma)
+            roi: Az aktivitási maszk is a detektálás része
+
+        Returns:
+            float: Kicsinyítési arány (1: nincs kicsinyítés, 0: a detektálásra nincs idő)
+        """
+        if self.budget is None:
+            return 1.0
+
+        # Ha a teljes felbontás becsült ideje bőven belefér, nincs szükség próbára
+        pixels = shape[0] * shape[1]
+        allowed = self.remaining(DEADLINE_DETECT_SHARE) * DEADLINE_PROBE_FRACTION
+        if self.detect_seconds(pixels, bands, roi) <= allowed:
+            self.start_detection(pixels, bands, roi)
+            return 1.0
+
+        # Különben a próba a hátralévő idő kis részét kapja, de legalább DEADLINE_MIN_PIXELS
+        # pixelen dolgozik (a pixelszám a méretarány négyzetével arányos). A próba mért
+        # ideje adja a gép tényleges sebességét (lásd calibrate és refine_scale).
+        fixed = self.detect_seconds(0, bands, roi)
+        scale = sqrt(max(allowed - fixed, 0) / (self.detect_seconds(pixels, bands, roi) - fixed))
+        scale = max(scale, min(1.0, sqrt(DEADLINE_MIN_PIXELS / pixels)))
+        if not self.start_detection(pixels * scale ** 2, bands, roi):
+            self.degrade("detection_skipped")
+            return 0.0
+        return scale
+
+
+    """ Nagyobb kicsinyítési arány a próba mért sebessége alapján """
+    def refine_scale(self, shape, scale, bands=1, roi=False):
+        """
+        Args:
+            shape: A kép mérete (magasság, szélesség)
+            scale: A próba kicsinyítési aránya
+            bands: Vízszintes sávok száma (0: a processzormagok száma)
+            roi: Az aktivitási maszk is a detektálás része
+
+        Returns:
+            float: Az újabb detektálás aránya, vagy scale, ha nem érdemes újra detektálni
+        """
+        if self.budget is None or not 0 < scale < 1:
+            return scale
+
+        # A hátralévő detektálási időben a mért sebességgel feldolgozható pixelszám
+        pixels = shape[0] * shape[1]
+        fixed = self.detect_seconds(0, bands, roi)
+        allowed = self.remaining(DEADLINE_DETECT_SHARE) / self.slowdown - fixed
+        refined = min(1.0, sqrt(max(allowed, 0) / (self.detect_seconds(pixels, bands, roi) - fixed)))
+
+        # Csak akkor detektálunk újra, ha a teljes felbontás belefér, vagy lényegesen több pixelt dolgozna fel
+        if refined < 1 and refined ** 2 < DEADLINE_REFINE_FACTOR * scale ** 2:
+            return scale
+        self.start_detection(pixels * refined ** 2, bands, roi)
+        return refined
+
+
+    """ A becslések igazítása a vonaldetektálás mért idejéhez """
+    def calibrate(self):
+        # Terhelt (vagy gyorsabb) gépen minden lépés a becsülttől eltérő ideig tart; a legutóbbi
+        # detektálás mért és becsült idejének arányával a kép további becsléseit igazítjuk
+        if self.detect_estimate > 0:
+            self.slowdown = (self.elapsed() - self.detect_start) / self.detect_estimate
+
+
+    """ Hough paraméterek emelt küszöbbel, ha az előfeldolgozás túl sokáig tartott """
+    def hough_params(self, params):
+        """
+        Args:
+            params: A Hough transzformáció paraméterei
+
+        Returns:
+            dict: A (szükség esetén emelt küszöbű) paraméterek
+        """
+        if not self.exceeded(DEADLINE_HOUGH_SHARE):
+            return params
+
+        # Magasabb küszöb mellett kevesebb szakasz marad, így a további lépések is gyorsabbak
+        self.degrade("hough_threshold")
+        return dict(params, threshold=params['threshold'] * DEADLINE_HOUGH_FACTOR)
+
+
+    """ A feldolgozott szakaszok számának korlátozása a leghosszabbakra """
+    def limit_segments(self, lines):
+        """
+        Args:
+            lines: Detektált vonalak listája vagy None
+
+        Returns:
+            numpy.ndarray: A hátralévő időben összevonható leghosszabb vonalak, vagy None
+        """
+        if self.budget is None or lines is None:
+            return lines
+
+        # Az összevonás négyzetes, ezért a szakaszok számát a hátralévő időből becsüljük,
+        # hogy az összevonást ne kelljen félbehagyni (a legrövidebb szakaszok maradnak ki)
+        allowed = self.remaining(DEADLINE_MERGE_SHARE)
+        pair_seconds = DEADLINE_PAIR_SECONDS * self.slowdown
+        limit = min(DEADLINE_MAX_SEGMENTS, max(DEADLINE_MIN_SEGMENTS, int(sqrt(allowed / pair_seconds))))
+        if len(lines) <= limit:
+            return lines
+
+        self.degrade("segment_cap")
+        lengths = np.array([LineDetector.line_length(line) for line in lines])
+        return lines[np.argsort(-lengths, kind="stable")[:limit]]
+
+
+    """ A vonalpárok vizsgálatába kerülő vonalak számának korlátozása a leghosszabbakra """
+    def limit_pairs(self, lines):
+        """
+        Args:
+            lines: Az összevont vonalak listája
+
+        Returns:
+            list: A hátralévő időben párosával megvizsgálható leghosszabb vonalak, eredeti sorrendben
+        """
+        if self.budget is None:
+            return lines
+
+        # A vonalpárok vizsgálata is négyzetes (n * (n - 1) / 2 pár), de legalább
+        # DEADLINE_MIN_SEGMENTS vonalat megvizsgálunk, ahogy a limit_segments is
+        allowed = self.remaining(DEADLINE_PAIRS_SHARE)
+        pair_seconds = DEADLINE_LINE_PAIR_SECONDS * self.slowdown
+        limit = max(DEADLINE_MIN_SEGMENTS, int(sqrt(2 * allowed / pair_seconds)))
+        if len(lines) <= limit:
+            return lines
+
+        self.degrade("pairs_truncated")
+        lengths = np.array([LineDetector.line_length(line) for line in lines])
+        keep = sorted(np.argsort(-lengths, kind="stable")[:limit])
+        return [lines[k] for k in keep]
@@ -3,22 +3,205 @@ ImageProcessor osztály
 --------------------
 A képfeldolgozási műveletek végrehajtásáért felelős osztály.
 Statikus metódusokat tartalmaz a képek előfeldolgozásához, vonalak
-detektálásához és a megjelenítéshez szükséges színek generálásához.
+detektálásához (soros vagy sávonként párhuzamos előfeldolgozással), az aktív (nem háttér)
+régiók meghatározásához és a megjelenítéshez szükséges színek generálásához.
 """
 
 import cv2
+import os
 import numpy as np
-from constants import HOUGH_PARAMS
+from math import ceil
+from concurrent.futures import ThreadPoolExecutor
+from constants import (HOUGH_PARAMS, ROI_DOWNSCALE, ROI_TILE_SIZE, ROI_VARIANCE_THRESHOLD, ROI_HALO,
+                       ROI_STRIP_TILES, ROI_MAX_WORK_FRACTION,
+                       PARALLEL_BANDS, DEADLINE_HOUGH_SKIP_SHARE)
 
 
 class ImageProcessor:
 
+    """ Aktivitási maszk számítása csempénkénti szórásnégyzet alapján """
+    @staticmethod
+    def compute_roi_mask(image):
+        """
+        Args:
+            image: BGR színtérben lévő bemeneti kép
+
+        Returns:
+            numpy.ndarray: A kép méretével megegyező maszk (255: aktív, 0: háttér)
+        """
+        height, width = image.shape[:2]
+
+        # Szürkeárnyalatos, kicsinyített kép az olcsó becsléshez
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, None, fx=1 / ROI_DOWNSCALE, fy=1 / ROI_DOWNSCALE,
+                           interpolation=cv2.INTER_AREA).astype(np.float32)
+
+        # Csemperács mérete
+        grid_w = max(1, ceil(width / ROI_TILE_SIZE))
+        grid_h = max(1, ceil(height / ROI_TILE_SIZE))
+
+        # Csempénkénti átlag és négyzetes átlag, ebből a szórásnégyzet
+        mean = cv2.resize(small, (grid_w, grid_h), interpolation=cv2.INTER_AREA)
+        sq_mean = cv2.resize(small * small, (grid_w, grid_h), interpolation=cv2.INTER_AREA)
+        variance = sq_mean - mean * mean
+
+        # Aktív csempék kijelölése, a szomszédos csempék hozzávétele,
+        # hogy a pálcikák végei és a szűrők környezete se vesszen el
+        active = np.where(variance > ROI_VARIANCE_THRESHOLD, 255, 0).astype(np.uint8)
+        active = cv2.dilate(active, np.ones((3, 3), np.uint8))
+
+        # Visszanagyítás az eredeti kép méretére
+        return cv2.resize(active, (width, height), interpolation=cv2.INTER_NEAREST)
+
+
+    """ Aktív csempék összevonása téglalapokká """
+    @staticmethod
+    def get_roi_tiles(roi_mask):
+        """
+        Args:
+            roi_mask: Aktivitási maszk (nem nulla: aktív)
+
+        Returns:
+            list: Téglalapok listája (x, y, w, h) formátumban. A csempesorokat
+            ROI_STRIP_TILES magas csíkokba vonjuk össze, a csíkokban az aktív
+            oszlopszakaszok adják a téglalapokat, az egymás alatti azonos
+            szakaszokat pedig egy téglalappá fűzzük, hogy kevesebb ráhagyás kelljen
+        """
+        height, width = roi_mask.shape[:2]
+        grid_h = ceil(height / ROI_TILE_SIZE)
+        grid_w = ceil(width / ROI_TILE_SIZE)
+
+        # Maszk kiegészítése a csempeméret többszörösére, majd csempénkénti "van-e aktív pixel"
+        # (előbb a csempesorokon belül, utána a csempeoszlopokon belül vett maximum)
+        padded = cv2.copyMakeBorder(roi_mask.astype(np.uint8), 0, grid_h * ROI_TILE_SIZE - height,
+                                    0, grid_w * ROI_TILE_SIZE - width, cv2.BORDER_CONSTANT, value=0)
+        rows = padded.reshape(grid_h, ROI_TILE_SIZE, grid_w * ROI_TILE_SIZE).max(axis=1)
+        grid = rows.reshape(grid_h, grid_w, ROI_TILE_SIZE).max(axis=2) > 0
+
+        rects = []
+        open_rects = {}     # Az előző csík szakaszai: (kezdő, záró oszlop) -> téglalap indexe
+        for strip in range(0, grid_h, ROI_STRIP_TILES):
+            # Egy oszlop aktív, ha a csík bármelyik csempéje aktív benne
+            columns = grid[strip:strip + ROI_STRIP_TILES].any(axis=0)
+
+            # Az aktív szakaszok kezdete és vége a csíkban
+            changes = np.diff(np.concatenate(([0], columns.astype(np.int8), [0])))
+            starts = np.flatnonzero(changes == 1)
+            ends = np.flatnonzero(changes == -1)
+
+            strip_rects = {}
+            for start, end in zip(starts, ends):
+                y = strip * ROI_TILE_SIZE
+                h = min(ROI_STRIP_TILES * ROI_TILE_SIZE, height - y)
+
+                # Ha az előző csíkban ugyanez a szakasz aktív volt, a téglalapot lefelé bővítjük
+                if (start, end) in open_rects:
+                    index = open_rects[(start, end)]
+                    rects[index][3] += h
+                else:
+                    x = start * ROI_TILE_SIZE
+                    rects.append([x, y, min(end * ROI_TILE_SIZE, width) - x, h])
+                    index = len(rects) - 1
+                strip_rects[(start, end)] = index
+            open_rects = strip_rects
+
+        return [tuple(int(v) for v in rect) for rect in rects]
+
+
+    """ Téglalap kibővítése a szűrők környezetéhez szükséges ráhagyással """
+    @staticmethod
+    def expand_rect(rect, shape):
+        """
+        Args:
+            rect: Téglalap (x, y, w, h) formátumban
+            shape: A kép mérete (magasság, szélesség)
+
+        Returns:
+            tuple: A kibővített, képre vágott téglalap (x0, y0, x1, y1) formátumban
+        """
+        x, y, w, h = rect
+        height, width = shape[:2]
+        return (max(x - ROI_HALO, 0), max(y - ROI_HALO, 0),
+                min(x + w + ROI_HALO, width), min(y + h + ROI_HALO, height))
+
+
+    """ A ráhagyással együtt feldolgozott pixelek aránya a teljes képhez képest """
+    @staticmethod
+    def roi_work_fraction(rects, shape):
+        """
+        Args:
+            rects: A feldolgozandó téglalapok (x, y, w, h) formátumban
+            shape: A kép mérete (magasság, szélesség)
+
+        Returns:
+            float: A szűrők által ténylegesen érintett pixelek aránya (1 felett is lehet)
+        """
+        work = 0
+        for rect in rects:
+            x0, y0, x1, y1 = ImageProcessor.expand_rect(rect, shape)
+            work += (x1 - x0) * (y1 - y0)
+        return work / (shape[0] * shape[1])
+
+
+    """ A kihagyott (háttér) pixelek arányának számítása """
+    @staticmethod
+    def roi_skipped_fraction(rects, shape):
+        """
+        Args:
+            rects: Az aktív téglalapok (get_roi_tiles) (x, y, w, h) formátumban
+            shape: A kép mérete (magasság, szélesség)
+
+        Returns:
+            float: Az előfeldolgozásból ténylegesen kihagyott pixelek aránya (0-1 között),
+            a régiók ráhagyását is beszámítva
+        """
+        work = ImageProcessor.roi_work_fraction(rects, shape)
+
+        # Ha a régiók feldolgozása nem lenne olcsóbb, a teljes kép kerül feldolgozásra
+        if work >= ROI_MAX_WORK_FRACTION:
+            return 0.0
+        return 1 - work
+
+
+    """ Megadott téglalapok előfeldolgozása ráhagyással """
+    @staticmethod
+    def preprocess_rects(image, rects, binary=None, edges=None):
+        """
+        Args:
+            image: BGR színtérben lévő bemeneti kép
+            rects: A feldolgozandó téglalapok (x, y, w, h) formátumban
+            binary: Opcionális kimeneti bináris kép (a kép méretében), különben új, nullázott kép
+            edges: Opcionális kimeneti élkép (a kép méretében), különben új, nullázott kép
+
+        Returns:
+            tuple: (binary, edges), a téglalapokon kívül változatlan tartalommal
+        """
+        if binary is None:
+            binary = np.zeros(image.shape[:2], np.uint8)
+        if edges is None:
+            edges = np.zeros(image.shape[:2], np.uint8)
+
+        for x, y, w, h in rects:
+            # A téglalapot ráhagyással dolgozzuk fel, hogy a szűrők a
+            # széleken is ugyanazt adják, mint a teljes képen
+            x0, y0, x1, y1 = ImageProcessor.expand_rect((x, y, w, h), image.shape)
+            region_binary, region_edges = ImageProcessor.preprocess_image(image[y0:y1, x0:x1])
+
+            # Csak a ráhagyás nélküli belső részt írjuk vissza
+            binary[y:y + h, x:x + w] = region_binary[y - y0:y - y0 + h, x - x0:x - x0 + w]
+            edges[y:y + h, x:x + w] = region_edges[y - y0:y - y0 + h, x - x0:x - x0 + w]
+
+        return binary, edges
+
+
     """ Képfeldolgozási műveletek végrehajtása """
     @staticmethod
-    def preprocess_image(image):
+    def preprocess_image(image, rects=None):
         """
         Args:
             image: BGR színtérben lévő bemeneti kép
+            rects: Opcionális aktív téglalapok (get_roi_tiles), megadása esetén
+                   csak az aktív régiók kerülnek feldolgozásra
 
         Returns:
             tuple: (binary, edges)
@@ -26,6 +209,20 @@ class ImageProcessor:
                 - edges: Éldetektált kép
         """
 
+        # Csak az aktív régiók feldolgozása, a háttér nulla marad
+        if rects is not None:
+            if ImageProcessor.roi_work_fraction(rects, image.shape) < ROI_MAX_WORK_FRACTION:
+                return ImageProcessor.preprocess_rects(image, rects)
+
+            # Ha a ráhagyásokkal együtt nem lenne olcsóbb, a teljes képet dolgozzuk fel,
+            # és a régiókon kívül nullázunk, így az eredmény ugyanaz marad
+            binary, edges = ImageProcessor.preprocess_image(image)
+            keep = np.zeros(image.shape[:2], np.uint8)
+            for x, y, w, h in rects:
+                keep[y:y + h, x:x + w] = 255
+            return (cv2.bitwise_and(binary, binary, mask=keep),
+                    cv2.bitwise_and(edges, edges, mask=keep))
+
         # Szürkeárnyalatos konverzió
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
@@ -57,22 +254,142 @@ class ImageProcessor:
 
     """ Vonalak detektálása Hough transzformációval """
     @staticmethod
-    def detect_lines(edges):
+    def detect_lines(edges, roi_mask=None, hough_params=HOUGH_PARAMS):
         """
         Args:
             edges: Éldetektált bináris kép
+            roi_mask: Opcionális aktivitási maszk, megadása esetén a Hough
+                      transzformáció csak a maszkon belüli élpontokat veszi figyelembe
+            hough_params: A Hough transzformáció paraméterei (alapértelmezett: HOUGH_PARAMS)
 
         Returns:
             numpy.ndarray: Detektált vonalak listája, minden vonal [x1, y1, x2, y2] formátumban
             vagy None, ha nem talált vonalakat
         """
-        # A HoughLinesP függvény paraméterei a constants.py HOUGH_PARAMS szótárából:
+
+        # Az élkép maszkon kívüli részének nullázása. A HoughLinesP csak a nem nulla
+        # pixelekre szavaz, így a háttér külön régiókra bontás nélkül sem kerül semmibe
+        # (a régiónkénti futtatás nem gyorsítana, az átfedő régiók pedig duplán szavaznának)
+        if roi_mask is not None:
+            edges = cv2.bitwise_and(edges, edges, mask=(roi_mask > 0).astype(np.uint8))
+
+        # A HoughLinesP függvény paraméterei (alapértelmezetten a constants.py HOUGH_PARAMS szótárából):
         # - rho: A Hough tér felbontása pixelekben
         # - theta: A Hough tér szögfelbontása radiánban
         # - threshold: Minimális metszéspont szám a Hough térben
         # - minLineLength: Minimális vonalhossz
         # - maxLineGap: Maximális rés két vonalszegmens között
-        return cv2.HoughLinesP(edges, **HOUGH_PARAMS)
+        return cv2.HoughLinesP(edges, **hough_params)
+
+
+    """ Előfeldolgozás vízszintes sávokban, párhuzamosan """
+    @staticmethod
+    def preprocess_bands_parallel(image, bands=PARALLEL_BANDS, rects=None):
+        """
+        Args:
+            image: BGR színtérben lévő bemeneti kép
+            bands: Sávok száma (0: a processzormagok száma)
+            rects: Opcionális aktív téglalapok (get_roi_tiles), megadása esetén
+                   csak az aktív régiók kerülnek feldolgozásra (mint a preprocess_image-nél)
+
+        Returns:
+            tuple: (binary, edges), megegyezik a preprocess_image(image, rects) eredményével
+        """
+        height, width = image.shape[:2]
+        if bands <= 0:
+            bands = os.cpu_count() or 1
+        bands = max(1, min(bands, height))
+
+        # Sávhatárok: a sávok belső (átfedés nélküli) sorai
+        limits = [round(height * i / bands) for i in range(bands + 1)]
+        cores = list(zip(limits[:-1], limits[1:]))
+
+        binary = np.zeros((height, width), np.uint8)
+        edges = np.zeros((height, width), np.uint8)
+
+        # A feldolgozandó téglalapok a teljes képre számolva, így a csemperács nem függ
+        # a sávhatároktól. Ha a régiók a ráhagyásokkal együtt nem lennének olcsóbbak,
+        # a soros úthoz hasonlóan a teljes képet dolgozzuk fel, és utólag nullázunk.
+        keep = None
+        work_rects = [(0, 0, width, height)]
+        if rects is not None:
+            if ImageProcessor.roi_work_fraction(rects, image.shape) < ROI_MAX_WORK_FRACTION:
+                work_rects = rects
+            else:
+                keep = np.zeros((height, width), np.uint8)
+                for x, y, w, h in rects:
+                    keep[y:y + h, x:x + w] = 255
+
+        """ Előfeldolgozás sávonként """
+        def preprocess_band(core):
+            # A téglalapok sávba eső részét dolgozzuk fel. A ráhagyást a teljes
+            # képen vesszük, így a határon is ugyanazt kapjuk, mint soros futásnál.
+            y0, y1 = core
+            band_rects = [(x, max(y, y0), w, min(y + h, y1) - max(y, y0))
+                          for x, y, w, h in work_rects if y < y1 and y + h > y0]
+            ImageProcessor.preprocess_rects(image, band_rects, binary, edges)
+
+        # A cv2 függvények feloldják a GIL-t, így a szálak valóban párhuzamosan futnak
+        with ThreadPoolExecutor(max_workers=bands) as executor:
+            list(executor.map(preprocess_band, cores))
+
+        if keep is not None:
+            binary = cv2.bitwise_and(binary, binary, mask=keep)
+            edges = cv2.bitwise_and(edges, edges, mask=keep)
+        return binary, edges
+
+
+    """ Előfeldolgozás vízszintes sávokban, párhuzamosan, majd vonaldetektálás """
+    @staticmethod
+    def process_bands_parallel(image, roi_mask=None, bands=PARALLEL_BANDS,
+                               hough_params=HOUGH_PARAMS, deadline=None, rects=None):
+        """
+        Args:
+            image: BGR színtérben lévő bemeneti kép
+            roi_mask: Opcionális aktivitási maszk
+            bands: Sávok száma (0: a processzormagok száma)
+            hough_params: A Hough transzformáció paraméterei
+            deadline: Opcionális időkeret (Deadline), a vonaldetektálás előtt ellenőrizzük
+            rects: Az aktív téglalapok (get_roi_tiles), ha a hívó már kiszámolta
+
+        Returns:
+            tuple: (binary, edges, lines)
+                - binary: Binarizált kép
+                - edges: Éldetektált kép
+                - lines: A detektált vonalak, vagy None
+        """
+        if rects is None and roi_mask is not None:
+            rects = ImageProcessor.get_roi_tiles(roi_mask)
+        binary, edges = ImageProcessor.preprocess_bands_parallel(image, bands, rects)
+
+        # A Hough transzformáció a teljes élképen fut: a valószínűségi Hough a sávokban
+        # más pontsorrendet látna, így a darabszám eltérne a soros futásétól
+        lines = ImageProcessor.detect_lines_timed(edges, roi_mask, hough_params, deadline)
+        return binary, edges, lines
+
+
+    """ Vonaldetektálás egy kész élképen, időkerettel """
+    @staticmethod
+    def detect_lines_timed(edges, roi_mask=None, hough_params=HOUGH_PARAMS, deadline=None):
+        """
+        Args:
+            edges: Éldetektált bináris kép (frissen számolt vagy mentett)
+            roi_mask: Opcionális aktivitási maszk
+            hough_params: A Hough transzformáció paraméterei
+            deadline: Opcionális időkeret (Deadline), a Hough előtt ellenőrizzük
+
+        Returns:
+            numpy.ndarray: A detektált vonalak, vagy None
+        """
+
+        # Időkeret túllépése esetén emelt küszöbbel detektálunk, vagy a detektálás elmarad
+        if deadline is not None:
+            if deadline.exceeded(DEADLINE_HOUGH_SKIP_SHARE):
+                deadline.degrade("hough_skipped")
+                return None
+            hough_params = deadline.hough_params(hough_params)
+
+        return ImageProcessor.detect_lines(edges, roi_mask, hough_params)
 
 
     """ Egyedi színek generálása """
@@ -8,7 +8,7 @@ kereszteződések detektálásához és párhuzamos vonalak kezeléséhez.
 
 import numpy as np
 from math import sqrt
-from constants import MIN_ANGLE_DIFF
+from constants import MIN_ANGLE_DIFF, DEADLINE_MERGE_SHARE
 
 
 class LineDetector:
@@ -174,10 +174,12 @@ class LineDetector:
 
     """ Vonalak összevonása párhuzamosság és közelség alapján """
     @staticmethod
-    def merge_lines(lines):
+    def merge_lines(lines, deadline=None):
         """
         Args:
             lines: Vonalak listája, minden vonal [[x1, y1, x2, y2]] formátumban
+            deadline: Opcionális időkeret (Deadline); ha elfogy, a még nem vizsgált
+                      (rövidebb) vonalak összevonás nélkül kerülnek az eredménybe
 
         Returns:
             list: Összevont vonalak listája [[x1, y1, x2, y2]] formátumban
@@ -202,6 +204,13 @@ class LineDetector:
             if used[i]:
                 continue
 
+            # Ha elfogyott az időkeret, a maradék rövidebb vonalakat összevonás nélkül átvesszük
+            # (a leghosszabb vonal csoportja mindig elkészül)
+            if merged_lines and deadline is not None and deadline.exceeded(DEADLINE_MERGE_SHARE):
+                deadline.degrade("merge_truncated")
+                merged_lines.extend(lines[k] for k, _ in line_lengths if not used[k])
+                break
+
             # Új csoport kezdése az aktuális vonallal
             current_group = [lines[i][0]]
             used[i] = True
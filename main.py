@@ -4,11 +4,37 @@ Pálcika detektáló program
 """
 
 import cv2
+import numpy as np
 from math import sqrt
 import os
+import sys
+import time
+import zlib
+import struct
+from deadline import Deadline
+from mask_storage import MaskStorage
 from line_detector import LineDetector
 from image_processor import ImageProcessor
-from constants import INPUT_DIR, OUTPUT_DIR, MIN_LINE_LENGTH
+from constants import (INPUT_DIR, OUTPUT_DIR, MIN_LINE_LENGTH, ROI_ENABLED, ROI_MASK_SUFFIX, PARALLEL_BANDS,
+                       HOUGH_PARAMS, TIME_BUDGET, DEADLINE_SAVE_PIXELS_PER_SECOND, DEADLINE_COPY_PIXELS_PER_SECOND,
+                       DEADLINE_SAVE_SHARE, DEADLINE_PAIRS_SHARE, DEADLINE_GROUPING_SHARE, DEADLINE_MIN_SEGMENTS,
+                       MASK_EXTENSION, MASK_COMPRESS, CHECK_BANDS, CHECK_TIMING_RUNS, CHECK_BUDGETS, CHECK_COUNT_TOLERANCE,
+                       CHECK_ROI_MAX_COUNT_DIFF)
+
+
+""" Kimeneti fájlnév generálása a bemeneti fájlnév alapján """
+def output_filename(base_filename, suffix, extension=".jpg"):
+    """
+    Args:
+        base_filename: Bemeneti fájl neve
+        suffix: A fájlnévhez hozáadandó toldalék
+        extension: A kimeneti fájl kiterjesztése
+
+    Returns:
+        str: A kimeneti fájl elérési útja
+    """
+    base_name = os.path.splitext(os.path.basename(base_filename))[0]
+    return OUTPUT_DIR + f"/{base_name}_{suffix}{extension}"
 
 
 """ Kép mentése az output könyvtárba """
@@ -23,66 +49,255 @@ def save_image(image, base_filename, suffix):
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
-    # Bemeneti fájlnév alapján kimeneti fájlnév generálása
-    base_name = os.path.splitext(os.path.basename(base_filename))[0]
-    output_filename = OUTPUT_DIR + f"/{base_name}_{suffix}.jpg"
+    # Kép mentése a bemeneti fájlnév alapján generált néven
+    cv2.imwrite(output_filename(base_filename, suffix), image)
 
-    # Kép mentése
-    cv2.imwrite(output_filename, image)
 
+""" Bináris köztes kép mentése bitekre pakolva az output könyvtárba """
+def save_mask(mask, base_filename, suffix):
+    """
+    Args:
+        mask: A lementendő bináris kép
+        base_filename:  Bemeneti fájl neve
+        suffix: A fájlnévhez hozáadandó toldalék
+    """
+    # Output könyvtár létrehozása, ha nem létezik
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
 
-""" Főprogram """
-def main():
+    # Veszteségmentes, pixelpontos mentés (a JPEG tömörítés torzítaná a maszkot)
+    MaskStorage.save(mask, output_filename(base_filename, suffix, MASK_EXTENSION), MASK_COMPRESS)
 
-    # Konzol menű
-    print("\nVálasszon egy képet az elemzéshez:")
-    print("1 - palcika1.jpg")
-    print("2 - palcika2.jpg")
-    print("3 - palcika3.jpg")
-    print("4 - palcika4.jpg")
 
-    # Felhasználói választás
-    choice = input("Kérem adja meg a választott kép számát (1-4): ").strip()
+""" Mentett éldetektált kép betöltése """
+def load_edges(base_filename):
+    """
+    Args:
+        base_filename: Bemeneti fájl neve
 
-    # A válasz elenőrzése
-    if choice not in ['1', '2', '3', '4']:
-        print("Érvénytelen választás! Kérem válasszon 1-4 között.")
-        return
+    Returns:
+        numpy.ndarray: A mentett élkép, vagy None ha nincs mentett élkép
+    """
+    edges_filename = output_filename(base_filename, "edges", MASK_EXTENSION)
+    if not os.path.exists(edges_filename):
+        return None
 
-    # A kép nevének létrehozása, létezésének ellenőrzése
-    filename = INPUT_DIR + f"/palcika{choice}.jpg"
-    if not os.path.exists(filename):
-        print(f"A kép nem található: {filename}")
-        return
+    # Egy megszakított korábbi futás sérült vagy csonka fájlt hagyhatott hátra,
+    # ilyenkor a képet újra feldolgozzuk
+    try:
+        return MaskStorage.load(edges_filename)
+    except (ValueError, struct.error, zlib.error) as error:
+        print(f"A mentett elkep serult, ujra feldolgozzuk: {error}")
+        return None
 
-    # A kép betöltése, sikereségének ellenőrzése
-    image = cv2.imread(filename)
-    if image is None:
-        print("Nem sikerult betolteni a kepet!")
+
+""" Aktivitási maszk betöltése vagy számítása """
+def load_roi_mask(image, filename):
+    """
+    Args:
+        image: A feldolgozandó kép
+        filename: Bemeneti fájl neve
+
+    Returns:
+        numpy.ndarray: Aktivitási maszk a kép méretében
+    """
+    # Felhasználói maszk keresése a bemeneti kép mellett (pl. palcika1_mask.png)
+    mask_filename = os.path.splitext(filename)[0] + f"{ROI_MASK_SUFFIX}.png"
+    if os.path.exists(mask_filename):
+        mask = cv2.imread(mask_filename, cv2.IMREAD_GRAYSCALE)
+        if mask is not None:
+            return cv2.resize(mask, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST)
+
+    # Ha nincs (vagy nem olvasható) maszk, becsüljük a képből
+    return ImageProcessor.compute_roi_mask(image)
+
+
+""" Az időkeret felhasználásának kiírása """
+def print_deadline(deadline):
+    """
+    Args:
+        deadline: A kép feldolgozásának időkerete (Deadline)
+    """
+    if deadline.budget is None:
         return
+    print(f"Futasido: {deadline.elapsed():.3f} s (keret: {deadline.budget} s)")
+    if deadline.degraded():
+        print(f"Alkalmazott minosegcsokkentesek: {', '.join(deadline.degradations)}")
+
+
+""" Előfeldolgozás és vonaldetektálás adott kicsinyítési arány mellett """
+def detect_sticks(image, filename, scale, deadline, bands=PARALLEL_BANDS, roi=ROI_ENABLED, edges=None):
+    """
+    Args:
+        image: BGR színtérben lévő bemeneti kép
+        filename: Bemeneti fájl neve
+        scale: Kicsinyítési arány (1: teljes felbontás)
+        deadline: A kép feldolgozásának időkerete (Deadline)
+        bands: Vízszintes sávok száma a párhuzamos feldolgozáshoz (1: soros)
+        roi: Háttér kihagyása az aktív régiók alapján
+        edges: Mentett élkép (a scale arányú felbontáson), megadása esetén az előfeldolgozás kimarad
+
+    Returns:
+        tuple: (binary, edges, lines)
+            - binary: Binarizált kép (mentett élkép esetén None)
+            - edges: Éldetektált kép
+            - lines: A detektált vonalak az eredeti kép koordinátáiban, vagy None
+    """
+    work_image = image
+    hough_params = HOUGH_PARAMS
+    if scale < 1:
+        # INTER_LINEAR: a nem egész arányú INTER_AREA nagyságrenddel lassabb, az élsimítást
+        # pedig az előfeldolgozás Gauss szűrője amúgy is elvégzi
+        size = (round(image.shape[1] * scale), round(image.shape[0] * scale))
+        if edges is not None:
+            size = (edges.shape[1], edges.shape[0])
+        work_image = cv2.resize(image, size, interpolation=cv2.INTER_LINEAR)
+
+        # A pixelben megadott Hough paraméterek arányos csökkentése
+        hough_params = dict(HOUGH_PARAMS,
+                            threshold=max(1, int(HOUGH_PARAMS['threshold'] * scale)),
+                            minLineLength=HOUGH_PARAMS['minLineLength'] * scale,
+                            maxLineGap=HOUGH_PARAMS['maxLineGap'] * scale)
+
+    # Aktív régiók meghatározása a feldolgozott (esetleg kicsinyített) képen, a háttér kihagyása
+    # (a téglalapokat egyszer számoljuk, és ezeket kapja az előfeldolgozás is)
+    roi_mask = rects = None
+    if roi:
+        roi_mask = load_roi_mask(work_image, filename)
+        rects = ImageProcessor.get_roi_tiles(roi_mask)
+        print(f"Kihagyott hatter aranya: {ImageProcessor.roi_skipped_fraction(rects, roi_mask.shape):.1%}")
+
+    binary = None
+    if edges is not None:
+        # Vonaldetektálás a mentett élképen, előfeldolgozás nélkül
+        lines = ImageProcessor.detect_lines_timed(edges, roi_mask, hough_params, deadline)
+    elif bands != 1:
+        # Előfeldolgozás és vonaldetektálás párhuzamosan, vízszintes sávokban
+        binary, edges, lines = ImageProcessor.process_bands_parallel(work_image, roi_mask, bands,
+                                                                     hough_params=hough_params,
+                                                                     deadline=deadline, rects=rects)
+    else:
+        # Előfeldolgozás és vonaldetektálás a teljes képen
+        binary, edges = ImageProcessor.preprocess_image(work_image, rects)
+        lines = ImageProcessor.detect_lines_timed(edges, roi_mask, hough_params, deadline)
+
+    # Vonalak visszaállítása az eredeti kép koordinátáira
+    if scale < 1 and lines is not None:
+        lines = np.round(lines / scale).astype(lines.dtype)
+
+    return binary, edges, lines
+
+
+""" Egy kép feldolgozása, az eredmény kép elkészítése """
+def process_image(image, filename, batch=False, resume=False, bands=PARALLEL_BANDS, save=True,
+                  time_budget=TIME_BUDGET, roi=ROI_ENABLED):
+    """
+    Args:
+        image: BGR színtérben lévő bemeneti kép
+        filename: Bemeneti fájl neve
+        batch: Kötegelt futás, a köztes képek bitekre pakolva kerülnek mentésre
+        resume: A mentett élképről indul (ha létezik és illik a képhez), az előfeldolgozás kimarad
+        bands: Vízszintes sávok száma a párhuzamos feldolgozáshoz (1: soros)
+        save: False esetén semmilyen kép nem kerül mentésre (pl. ellenőrzésnél)
+        time_budget: Időkeret másodpercben (None: nincs korlát)
+        roi: Háttér kihagyása az aktív régiók alapján
+
+    Returns:
+        tuple: (result, count, degradations)
+            - result: Az eredmény kép a jelölésekkel, vagy None ha nem talált pálcikákat
+            - count: A talált pálcikák száma
+            - degradations: Az időkeret miatt alkalmazott minőségcsökkentések nevei
+    """
 
     # Kép előfeldolgozása
     print(f"Kép feldolgozása: {filename}")
-    binary, edges = ImageProcessor.preprocess_image(image)
-
-    # Köztes képek mentése
-    save_image(binary, filename, "binary")
-    save_image(edges, filename, "edges")
 
-    # Vonalak detektálása
-    lines = ImageProcessor.detect_lines(edges)
+    # Időkeret indítása (None esetén nincs korlát)
+    deadline = Deadline(time_budget)
+
+    # Ha a teljes kép vonaldetektálása nem fér bőven az időkeretbe, először kicsinyített képen
+    # detektálunk (próba), és ennek mért idejéből döntünk a nagyobb felbontásról
+    # (0 esetén a detektálásra sincs idő)
+    scale = deadline.detect_scale(image.shape, bands, roi)
+
+    # Újraindításkor a mentett élképről folytatjuk (az a korábbi futás felbontásán van)
+    edges = load_edges(filename) if resume and scale > 0 else None
+    if edges is not None:
+        stored_scale = edges.shape[1] / image.shape[1]
+
+        # Csak akkor használjuk, ha a képarány egyezik (legfeljebb 1 pixel eltéréssel), legalább
+        # akkora felbontású, mint amin most kezdenénk (időkeret nélkül a teljes), és a
+        # vonaldetektálás rajta belefér az időkeretbe
+        if stored_scale > 1 or abs(edges.shape[0] - round(image.shape[0] * stored_scale)) > 1:
+            print("A mentett elkep merete nem illik a kephez, ujra feldolgozzuk")
+            edges = None
+        elif (edges.shape[1] < round(image.shape[1] * scale) - 1 or
+              not deadline.start_detection(edges.size, bands, roi)):
+            print("A mentett elkep felbontasa elter a mostani feldolgozasetol, ujra feldolgozzuk")
+            edges = None
+        else:
+            print(f"Mentett elkep betoltve: {output_filename(filename, 'edges', MASK_EXTENSION)}")
+            scale = stored_scale
+
+    binary = lines = None
+    if edges is not None:
+        # Vonaldetektálás a mentett élképen, előfeldolgozás nélkül, ugyanúgy mint friss élképen
+        _, edges, lines = detect_sticks(image, filename, scale, deadline, bands, roi, edges)
+        deadline.calibrate()
+    elif scale > 0:
+        binary, edges, lines = detect_sticks(image, filename, scale, deadline, bands, roi)
+
+        # A további becslések igazítása a detektálás mért idejéhez
+        deadline.calibrate()
+
+        # Ha a próba mért sebességével a hátralévő időben lényegesen nagyobb felbontás is
+        # belefér, azon újra detektálunk. Ha annak Hough transzformációjára már nem maradt
+        # idő, a próba eredménye marad.
+        refined = deadline.refine_scale(image.shape, scale, bands, roi)
+        if refined > scale:
+            result = detect_sticks(image, filename, refined, deadline, bands, roi)
+            deadline.calibrate()
+            if result[2] is not None or "hough_skipped" not in deadline.degradations:
+                (binary, edges, lines), scale = result, refined
+
+    if 0 < scale < 1:
+        deadline.degrade("downscale")
+
+    # Köztes képek mentése (kötegelt futásnál bitekre pakolva, pixelpontosan),
+    # ha a becsült idejük belefér az időkeretbe
+    if binary is not None:
+        if save and not deadline.fits(2 * edges.size / DEADLINE_SAVE_PIXELS_PER_SECOND, DEADLINE_SAVE_SHARE):
+            deadline.degrade("intermediates_not_saved")
+        elif save and batch:
+            save_mask(binary, filename, "binary")
+            save_mask(edges, filename, "edges")
+        elif save:
+            save_image(binary, filename, "binary")
+            save_image(edges, filename, "edges")
+
+    # Időkeret esetén csak annyi (leghosszabb) szakaszt dolgozunk fel, amennyi összevonható
+    lines = deadline.limit_segments(lines)
 
     # Vonalak összevonása
-    merged_lines = LineDetector.merge_lines(lines)
+    merged_lines = LineDetector.merge_lines(lines, deadline)
 
     # Megvizsgáljuk hogy talált-e
     if merged_lines is None:
-        print("Nem talaltam palcikakat!")
-        return
+        # Ha a detektálás az időkeret miatt maradt el, nem állíthatjuk, hogy nincs pálcika
+        if lines is None and ("detection_skipped" in deadline.degradations or
+                              "hough_skipped" in deadline.degradations):
+            print("Nem maradt ido a palcikak keresesere!")
+        else:
+            print("Nem talaltam palcikakat!")
+        print_deadline(deadline)
+        return None, 0, deadline.degradations
 
     # Vonalak szűrése hossz alapján
     merged_lines = [line for line in merged_lines if LineDetector.line_length(line) > MIN_LINE_LENGTH]
 
+    # Időkeret esetén csak annyi (leghosszabb) vonalat vizsgálunk párosával, amennyi belefér
+    merged_lines = deadline.limit_pairs(merged_lines)
+
     # Kereszteződések és párhuzamos vonalak keresése
     intersections = []
     intersection_points = {}
@@ -93,6 +308,22 @@ def main():
     # Végigmegyünk az összes vonalon
     for i in range(len(merged_lines)):
 
+        # Ha elfogyott az időkeret, a hátralévő (rövidebb) vonalakat elhagyjuk, és a már
+        # vizsgált vonalak adatstruktúráiból is töröljük a rájuk mutató hivatkozásokat.
+        # A k-adik vonal pontjai a nagyobb indexű párjai sorrendjében követik egymást.
+        # (a DEADLINE_MIN_SEGMENTS leghosszabb vonal párjait mindig megvizsgáljuk, ahogy
+        # a limit_segments is legalább ennyi szakaszt hagy meg)
+        if i >= DEADLINE_MIN_SEGMENTS and deadline.exceeded(DEADLINE_PAIRS_SHARE):
+            deadline.degrade("pairs_truncated")
+            merged_lines = merged_lines[:i]
+            for k in range(i):
+                pairs = zip(sorted(intersection_map[k]), intersection_points[k])
+                intersection_points[k] = [point for j, point in pairs if j < i]
+                intersection_map[k] = {j for j in intersection_map[k] if j < i}
+                parallel_groups[k] = {j for j in parallel_groups[k] if j < i}
+            intersections = [point for k in range(i) for point in intersection_points[k]]
+            break
+
         # Inicializáljuk az i-edik vonalhoz tartozó adatstruktúrákat
         intersection_map[i] = set()     # Az i-edik vonallal kereszteződő vonalak indexei
         parallel_groups[i] = set()      # Az i-edik vonallal párhuzamos vonalak indexei
@@ -200,7 +431,13 @@ def main():
     used_points = set()                 # A már feldolgozott kereszteződési pontok
 
     # Végigmegyünk az összes kereszteződési ponton és a hozzájuk tartozó vonalakon
-    for point, lines in crossing_groups.items():
+    for n, (point, lines) in enumerate(crossing_groups.items()):
+
+        # Ha elfogyott az időkeret, a hátralévő pontokat nem dolgozzuk fel
+        # (az első DEADLINE_MIN_SEGMENTS pontot mindig, ahogy a vonalpároknál)
+        if n >= DEADLINE_MIN_SEGMENTS and deadline.exceeded(DEADLINE_GROUPING_SHARE):
+            deadline.degrade("crossings_truncated")
+            break
 
         # Ha ezt a pontot még nem dolgoztuk fel
         if point not in used_points:
@@ -231,7 +468,13 @@ def main():
     """ Kereszteződő vonalak csoportosítása szög alapján """
 
     # Végigmegyünk az összevont kereszteződési csoportokon
-    for group in merged_crossing_groups:
+    for n, group in enumerate(merged_crossing_groups):
+
+        # Ha elfogyott az időkeret, a hátralévő csoportokat nem dolgozzuk fel
+        # (az első DEADLINE_MIN_SEGMENTS csoportot mindig)
+        if n >= DEADLINE_MIN_SEGMENTS and deadline.exceeded(DEADLINE_GROUPING_SHARE):
+            deadline.degrade("grouping_truncated")
+            break
 
         # Kiszámoljuk minden vonalhoz a szögét és rendezzük őket
         angles = [(i, LineDetector.get_line_angle(merged_lines[i])) for i in group]
@@ -284,8 +527,16 @@ def main():
     print(f"Talalt keresztezodesek szama: {len(intersections)}")
 
     """ Eredmények megjelenítése """
-    # Az eredeti kép másolata, amin megjelenítjük az eredményeket
-    result = image.copy()
+    # Az eredeti kép másolata, amin megjelenítjük az eredményeket. Ha a teljes méretű
+    # másolat nem fér az időkeretbe, a feldolgozás (kicsinyített) méretében rajzolunk.
+    draw_scale = 1.0
+    if 0 < scale < 1 and not deadline.fits(image.shape[0] * image.shape[1] / DEADLINE_COPY_PIXELS_PER_SECOND):
+        deadline.degrade("result_downscaled")
+        draw_scale = scale
+        result = cv2.resize(image, (round(image.shape[1] * scale), round(image.shape[0] * scale)),
+                            interpolation=cv2.INTER_LINEAR)
+    else:
+        result = image.copy()
 
     # Egyedi színek generálása minden vonalcsoporthoz
     # Minimum 9 szín kell, hogy elég különböző szín legyen
@@ -298,7 +549,7 @@ def main():
 
         # A csoport összes vonalának megrajzolása
         for line in group:
-            x1, y1, x2, y2 = line[0]
+            x1, y1, x2, y2 = (round(v * draw_scale) for v in line[0])
             cv2.line(result, (x1, y1), (x2, y2), color, 2)
 
         # Ha van vonal a csoportban, kiírjuk a vonalak számát
@@ -315,15 +566,190 @@ def main():
 
             # Vonalak számának kiírása a csoport középpontjába
             cv2.putText(result, f"Vonalak: {len(group)}",
-                        (int(center_x), int(center_y)),
+                        (int(center_x * draw_scale), int(center_y * draw_scale)),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
     # Kereszteződések rajzolása
     for x, y in intersections:
-        cv2.circle(result, (x, y), 5, (0, 0, 255), -1)
+        cv2.circle(result, (round(x * draw_scale), round(y * draw_scale)), 5, (0, 0, 255), -1)
+
+    # Eredmény kép mentése, ha a becsült ideje belefér az időkeretbe
+    if save and not deadline.fits(result.shape[0] * result.shape[1] / DEADLINE_SAVE_PIXELS_PER_SECOND):
+        deadline.degrade("result_not_saved")
+    elif save:
+        save_image(result, filename, "result")
+
+    # Időkeret esetén a futásidő és az alkalmazott minőségcsökkentések kiírása
+    print_deadline(deadline)
+
+    return result, len(line_groups), deadline.degradations
+
+
+""" A bemeneti képek listája (a felhasználói maszkok kihagyásával) """
+def list_input_images():
+    """
+    Returns:
+        list: A bemeneti képek elérési útjai ábécérendben
+    """
+    return sorted(
+        INPUT_DIR + "/" + name for name in os.listdir(INPUT_DIR)
+        if os.path.splitext(name)[1].lower() in (".jpg", ".jpeg", ".png")
+        and not os.path.splitext(name)[0].endswith(ROI_MASK_SUFFIX))
+
+
+""" Az összes bemeneti kép feldolgozása felhasználói beavatkozás nélkül """
+def run_batch(resume=False):
+    """
+    Args:
+        resume: A mentett élképekről indul, ahol azok léteznek
+    """
+    for filename in list_input_images():
+        # A kép betöltése, sikereségének ellenőrzése
+        image = cv2.imread(filename)
+        if image is None:
+            print(f"Nem sikerult betolteni a kepet: {filename}")
+            continue
+
+        process_image(image, filename, batch=True, resume=resume)
+
+
+""" Az előfeldolgozás idejének mérése sávszámonként, az élképek egyezésének ellenőrzésével """
+def check_preprocess_timing(image, filename):
+    """
+    Args:
+        image: A vizsgált kép
+        filename: A kép neve (a kiíráshoz)
+
+    Returns:
+        bool: True ha minden sávszám a soros előfeldolgozással azonos élképet ad
+    """
+    ok = True
+
+    """ Egy előfeldolgozás legjobb ideje CHECK_TIMING_RUNS futásból, és az élkép """
+    def measure(preprocess):
+        times = []
+        for _ in range(CHECK_TIMING_RUNS):
+            start = time.perf_counter()
+            _, edges = preprocess()
+            times.append(time.perf_counter() - start)
+        return min(times), edges
+
+    serial, expected = measure(lambda: ImageProcessor.preprocess_image(image))
+    timings = [f"1 sav {serial * 1000:.1f} ms"]
+    for bands in CHECK_BANDS:
+        seconds, edges = measure(lambda: ImageProcessor.preprocess_bands_parallel(image, bands))
+        if not np.array_equal(edges, expected):
+            print(f"ELTERES: {filename}, {bands} sav: az elkep elter a sorostol")
+            ok = False
+        timings.append(f"{bands} sav {seconds * 1000:.1f} ms ({serial / seconds:.2f}x)")
+
+    print(f"Elofeldolgozas ({os.cpu_count()} processzormag): {', '.join(timings)}")
+    return ok
+
+
+""" Ellenőrzés: a sávokra bontott feldolgozás ugyanannyi pálcikát talál, mint a soros, a háttér
+    kihagyásával legfeljebb kicsit tér el, időkerettel pedig a darabszám arányaiban is csak kicsit tér el """
+def run_check():
+    """
+    Returns:
+        bool: True ha minden képen, sávszámnál és időkeretnél teljesülnek a feltételek
+    """
+    ok = True
+    for filename in list_input_images():
+        image = cv2.imread(filename)
+        if image is None:
+            print(f"Nem sikerult betolteni a kepet: {filename}")
+            ok = False
+            continue
+
+        # Soros referencia időkeret nélkül, majd a sávokra bontott futások
+        _, expected, _ = process_image(image, filename, bands=1, save=False, time_budget=None)
+        for bands in CHECK_BANDS:
+            _, count, _ = process_image(image, filename, bands=bands, save=False, time_budget=None)
+            if count != expected:
+                print(f"ELTERES: {filename}, {bands} sav: {count} palcika (soros: {expected})")
+                ok = False
+
+        # Háttér kihagyásával a csempék szélén elvesző élek miatt kis eltérés megengedett,
+        # a sávokra bontott ROI futásnak viszont pontosan a soros ROI futást kell adnia
+        _, roi_expected, _ = process_image(image, filename, bands=1, save=False, time_budget=None, roi=True)
+        if abs(roi_expected - expected) > CHECK_ROI_MAX_COUNT_DIFF:
+            print(f"ELTERES: {filename}, ROI: {roi_expected} palcika (ROI nelkul: {expected})")
+            ok = False
+        for bands in CHECK_BANDS:
+            _, count, _ = process_image(image, filename, bands=bands, save=False, time_budget=None, roi=True)
+            if count != roi_expected:
+                print(f"ELTERES: {filename}, ROI, {bands} sav: {count} palcika (soros ROI: {roi_expected})")
+                ok = False
+
+        # Az előfeldolgozás ideje sávszámonként és a gyorsulás a soroshoz képest
+        ok = check_preprocess_timing(image, filename) and ok
+
+        # Időkerettel futtatva (mentés nélkül, hogy a kimeneti képek ne íródjanak felül). A
+        # darabszám az időkeret nélkülihez mérten legfeljebb CHECK_COUNT_TOLERANCE hányaddal
+        # térhet el, és ha ott volt pálcika, itt is kell lennie. A falióra szerinti túllépés
+        # a gép terhelésétől függ, ezért csak figyelmeztetés.
+        tolerance = max(1, round(expected * CHECK_COUNT_TOLERANCE))
+        for budget in CHECK_BUDGETS:
+            start = time.perf_counter()
+            _, count, degradations = process_image(image, filename, bands=1, save=False, time_budget=budget)
+            elapsed = time.perf_counter() - start
+            if elapsed > budget:
+                print(f"FIGYELMEZTETES: {filename}, keret {budget} s: {elapsed:.3f} s")
+            if abs(count - expected) > tolerance or (expected and not count):
+                print(f"ELTERES: {filename}, keret {budget} s: {count} palcika (keret nelkul: {expected}, "
+                      f"minosegcsokkentesek: {', '.join(degradations)})")
+                ok = False
+
+    print("Ellenorzes rendben." if ok else "Ellenorzes sikertelen!")
+    return ok
+
+
+""" Főprogram """
+def main():
+
+    # Kötegelt futás: python main.py --batch [--resume]
+    if "--batch" in sys.argv[1:]:
+        run_batch(resume="--resume" in sys.argv[1:])
+        return
+
+    # Ellenőrzés: python main.py --check (sikertelenség esetén 1-es kilépési kód)
+    if "--check" in sys.argv[1:]:
+        if not run_check():
+            sys.exit(1)
+        return
+
+    # Konzol menű
+    print("\nVálasszon egy képet az elemzéshez:")
+    print("1 - palcika1.jpg")
+    print("2 - palcika2.jpg")
+    print("3 - palcika3.jpg")
+    print("4 - palcika4.jpg")
+
+    # Felhasználói választás
+    choice = input("Kérem adja meg a választott kép számát (1-4): ").strip()
 
-    # Eredmény kép mentése
-    save_image(result, filename, "result")
+    # A válasz elenőrzése
+    if choice not in ['1', '2', '3', '4']:
+        print("Érvénytelen választás! Kérem válasszon 1-4 között.")
+        return
+
+    # A kép nevének létrehozása, létezésének ellenőrzése
+    filename = INPUT_DIR + f"/palcika{choice}.jpg"
+    if not os.path.exists(filename):
+        print(f"A kép nem található: {filename}")
+        return
+
+    # A kép betöltése, sikereségének ellenőrzése
+    image = cv2.imread(filename)
+    if image is None:
+        print("Nem sikerult betolteni a kepet!")
+        return
+
+    # Kép feldolgozása
+    result, _, _ = process_image(image, filename)
+    if result is None:
+        return
 
     # Ablak létrehozása és fókuszba helyezése
     window_name = "Detektalt palcikak"
@@ -0,0 +1,98 @@
+"""
+MaskStorage osztály
+-----------------
+A bináris (egybites) köztes képek tömör tárolásáért felelős osztály.
+A maszkokat soronként bitekre pakolva (np.packbits), opcionálisan zlib
+tömörítéssel menti. A tömörítetlen fájlok dekódolás nélkül memóriába képezhetők.
+"""
+
+import os
+import zlib
+import struct
+import numpy as np
+
+# Fájlfejléc: azonosító (4 bájt), magasság és szélesség (uint32, little-endian), 4 bájt kitöltés
+HEADER = struct.Struct("<4sII4x")
+MAGIC_RAW = b"PMSK"     # Tömörítetlen, memóriába képezhető
+MAGIC_ZLIB = b"PMSZ"    # zlib tömörítésű
+
+
+class MaskStorage:
+
+    """ Maszk mentése bitekre pakolva """
+    @staticmethod
+    def save(mask, filename, compress=False):
+        """
+        Args:
+            mask: Bináris kép (nem nulla: 1-es bit)
+            filename: A kimeneti fájl neve
+            compress: True esetén zlib tömörítéssel mentünk
+        """
+        height, width = mask.shape[:2]
+
+        # Soronkénti pakolás, így egy sor ceil(width / 8) bájt
+        data = np.packbits(mask > 0, axis=1).tobytes()
+
+        # Ideiglenes fájlba írunk és csak a végén nevezzük át, így egy megszakított
+        # futás nem hagy maga után csonka (később betöltendő) fájlt
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, "wb") as file:
+            file.write(HEADER.pack(MAGIC_ZLIB if compress else MAGIC_RAW, height, width))
+            file.write(zlib.compress(data) if compress else data)
+        os.replace(temp_filename, filename)
+
+
+    """ Pakolt maszk betöltése kicsomagolás nélkül """
+    @staticmethod
+    def load_packed(filename):
+        """
+        Args:
+            filename: A bemeneti fájl neve
+
+        Returns:
+            tuple: (packed, width)
+                - packed: (magasság, ceil(szélesség / 8)) méretű uint8 tömb,
+                  tömörítetlen fájl esetén csak olvasható numpy.memmap
+                - width: A maszk eredeti szélessége pixelben
+
+        Raises:
+            ValueError: Ismeretlen formátum, vagy a fejléchez képest csonka fájl
+            zlib.error: Sérült tömörített adat
+        """
+        with open(filename, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise ValueError(f"Csonka maszk fejlec: {filename}")
+            magic, height, width = HEADER.unpack(header)
+            row_bytes = (width + 7) // 8
+
+            # Tömörített fájl: kicsomagolás a memóriába
+            if magic == MAGIC_ZLIB:
+                data = zlib.decompress(file.read())
+                if len(data) != height * row_bytes:
+                    raise ValueError(f"Csonka maszk adat: {filename}")
+                return np.frombuffer(data, np.uint8).reshape(height, row_bytes), width
+
+        if magic != MAGIC_RAW:
+            raise ValueError(f"Ismeretlen maszk formátum: {filename}")
+        if os.path.getsize(filename) < HEADER.size + height * row_bytes:
+            raise ValueError(f"Csonka maszk adat: {filename}")
+
+        # Tömörítetlen fájl: memóriába képezés dekódolás nélkül
+        packed = np.memmap(filename, dtype=np.uint8, mode="r", offset=HEADER.size,
+                           shape=(height, row_bytes))
+        return packed, width
+
+
+    """ Maszk betöltése 0/255 értékű képként """
+    @staticmethod
+    def load(filename):
+        """
+        Args:
+            filename: A bemeneti fájl neve
+
+        Returns:
+            numpy.ndarray: uint8 bináris kép (0 vagy 255), pl. a Hough transzformáció bemenete
+        """
+        packed, width = MaskStorage.load_packed(filename)
+        return np.unpackbits(packed, axis=1, count=width) * np.uint8(255)